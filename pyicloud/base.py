@@ -3,6 +3,7 @@ from uuid import uuid1
 import inspect
 import json
 import logging
+import threading
 from requests import Session
 from tempfile import gettempdir
 from os import path, mkdir
@@ -60,8 +61,15 @@ class PyiCloudSession(Session):
 
     def __init__(self, service):
         self.service = service
+        self._save_lock = threading.Lock()
         super().__init__()
 
+    def prepare_request(self, request):
+        # Merging the session cookies into the request iterates over the jar,
+        # which may be updated concurrently by responses on other threads.
+        with self.cookies._cookies_lock:  # pylint: disable=protected-access
+            return super().prepare_request(request)
+
     def request(self, method, url, **kwargs):  # pylint: disable=arguments-differ
 
         # Charge logging to the right service endpoint
@@ -80,21 +88,27 @@ class PyiCloudSession(Session):
         content_type = response.headers.get("Content-Type", "").split(";")[0]
         json_mimetypes = ["application/json", "text/json"]
 
-        for header, value in HEADER_DATA.items():
-            if response.headers.get(header):
-                session_arg = value
-                self.service.session_data.update(
-                    {session_arg: response.headers.get(header)}
-                )
+        # Photo page prefetching issues requests from a worker thread, so
+        # serialize updating session_data from the response headers and
+        # writing it to file. The cookie jar is saved under its own lock, as
+        # other responses add their cookies to it while it is written out.
+        cookies_lock = self.cookies._cookies_lock  # pylint: disable=protected-access
+        with self._save_lock, cookies_lock:
+            for header, value in HEADER_DATA.items():
+                if response.headers.get(header):
+                    session_arg = value
+                    self.service.session_data.update(
+                        {session_arg: response.headers.get(header)}
+                    )
 
-        # Save session_data to file
-        with open(self.service.session_path, "w", encoding="utf-8") as outfile:
-            json.dump(self.service.session_data, outfile)
-            #LOGGER.debug("Saved session data to file")
+            # Save session_data to file
+            with open(self.service.session_path, "w", encoding="utf-8") as outfile:
+                json.dump(self.service.session_data, outfile)
+                #LOGGER.debug("Saved session data to file")
 
-        # Save cookies to file
-        self.cookies.save(ignore_discard=True, ignore_expires=True)
-        #LOGGER.debug("Cookies saved to %s", self.service.cookiejar_path)
+            # Save cookies to file
+            self.cookies.save(ignore_discard=True, ignore_expires=True)
+            #LOGGER.debug("Cookies saved to %s", self.service.cookiejar_path)
 
         if not response.ok and (
             content_type not in json_mimetypes
@@ -1,16 +1,224 @@
 """Photo service."""
+import binascii
 import json
 import logging
-import base64
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
 
 from datetime import datetime, timezone
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from pyicloud.exceptions import PyiCloudServiceNotActivatedException
 from pyicloud.exceptions import PyiCloudAPIResponseException
 
 logger = logging.getLogger(__name__) 
 
+_ZONE_ID = {"zoneName": "PrimarySync"}
+
+# Every record field the photos web client requests.
+_FULL_KEYS = (
+    "resJPEGFullWidth",
+    "resJPEGFullHeight",
+    "resJPEGFullFileType",
+    "resJPEGFullFingerprint",
+    "resJPEGFullRes",
+    "resJPEGLargeWidth",
+    "resJPEGLargeHeight",
+    "resJPEGLargeFileType",
+    "resJPEGLargeFingerprint",
+    "resJPEGLargeRes",
+    "resJPEGMedWidth",
+    "resJPEGMedHeight",
+    "resJPEGMedFileType",
+    "resJPEGMedFingerprint",
+    "resJPEGMedRes",
+    "resJPEGThumbWidth",
+    "resJPEGThumbHeight",
+    "resJPEGThumbFileType",
+    "resJPEGThumbFingerprint",
+    "resJPEGThumbRes",
+    "resVidFullWidth",
+    "resVidFullHeight",
+    "resVidFullFileType",
+    "resVidFullFingerprint",
+    "resVidFullRes",
+    "resVidMedWidth",
+    "resVidMedHeight",
+    "resVidMedFileType",
+    "resVidMedFingerprint",
+    "resVidMedRes",
+    "resVidSmallWidth",
+    "resVidSmallHeight",
+    "resVidSmallFileType",
+    "resVidSmallFingerprint",
+    "resVidSmallRes",
+    "resSidecarWidth",
+    "resSidecarHeight",
+    "resSidecarFileType",
+    "resSidecarFingerprint",
+    "resSidecarRes",
+    "itemType",
+    "dataClassType",
+    "filenameEnc",
+    "originalOrientation",
+    "resOriginalWidth",
+    "resOriginalHeight",
+    "resOriginalFileType",
+    "resOriginalFingerprint",
+    "resOriginalRes",
+    "resOriginalAltWidth",
+    "resOriginalAltHeight",
+    "resOriginalAltFileType",
+    "resOriginalAltFingerprint",
+    "resOriginalAltRes",
+    "resOriginalVidComplWidth",
+    "resOriginalVidComplHeight",
+    "resOriginalVidComplFileType",
+    "resOriginalVidComplFingerprint",
+    "resOriginalVidComplRes",
+    "isDeleted",
+    "isExpunged",
+    "dateExpunged",
+    "remappedRef",
+    "recordName",
+    "recordType",
+    "recordChangeTag",
+    "masterRef",
+    "adjustmentRenderType",
+    "assetDate",
+    "addedDate",
+    "isFavorite",
+    "isHidden",
+    "orientation",
+    "duration",
+    "assetSubtype",
+    "assetSubtypeV2",
+    "assetHDRType",
+    "burstFlags",
+    "burstFlagsExt",
+    "burstId",
+    "captionEnc",
+    "locationEnc",
+    "locationV2Enc",
+    "locationLatitude",
+    "locationLongitude",
+    "adjustmentType",
+    "timeZoneOffset",
+    "vidComplDurValue",
+    "vidComplDurScale",
+    "vidComplDispValue",
+    "vidComplDispScale",
+    "vidComplVisibilityState",
+    "customRenderedValue",
+    "containerId",
+    "itemId",
+    "position",
+    "isKeyAsset",
+)
+
+# Fields needed to pair assets with their masters, and for the filename, type,
+# dates and original (plus live photo video) versions. Record metadata such as
+# the record name and change tag is returned regardless.
+_MINIMAL_KEYS = (
+    "masterRef",
+    "itemType",
+    "filenameEnc",
+    "assetDate",
+    "addedDate",
+    "resOriginalWidth",
+    "resOriginalHeight",
+    "resOriginalFileType",
+    "resOriginalRes",
+    "resOriginalVidComplWidth",
+    "resOriginalVidComplHeight",
+    "resOriginalVidComplFileType",
+    "resOriginalVidComplRes",
+)
+
+# Extensions of filenames that iCloud returns in plain text instead of base64.
+_PLAINTEXT_EXT_RE = re.compile(r"\.(?:png|dng|mp4|gif)", re.IGNORECASE)
+
+
+def _dumps(obj):
+    """Serializes a request body to compact JSON bytes, using orjson if available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _response_json(response):
+    """Decodes a JSON response body, using orjson if available."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+@lru_cache(maxsize=None)
+def _list_query_tail(results_limit, desired_keys):
+    """Returns the serialized, page-invariant tail of a list query body.
+
+    The leading '{' is dropped so it can be appended after the query head.
+    """
+    return _dumps(
+        {
+            "resultsLimit": results_limit,
+            "desiredKeys": desired_keys,
+            "zoneID": _ZONE_ID,
+        }
+    )[1:]
+
+
+@lru_cache(maxsize=None)
+def _count_query_json(obj_type):
+    """Returns the serialized item count query for an album object type."""
+    return _dumps(
+        {
+            "batch": [
+                {
+                    "resultsLimit": 1,
+                    "query": {
+                        "filterBy": {
+                            "fieldName": "indexCountID",
+                            "fieldValue": {"type": "STRING_LIST", "value": [obj_type]},
+                            "comparator": "IN",
+                        },
+                        "recordType": "HyperionIndexCountLookup",
+                    },
+                    "zoneWide": True,
+                    "zoneID": _ZONE_ID,
+                }
+            ]
+        }
+    )
+
+
+def _version_plan(version_lookup):
+    """Returns (key, width, height, res, file type field names) per version."""
+    return tuple(
+        (key, f"{prefix}Width", f"{prefix}Height", f"{prefix}Res", f"{prefix}FileType")
+        for key, prefix in version_lookup.items()
+    )
+
+
+def _item_info(item_types, item_type_extensions):
+    """Returns (item type, item type extension) per uniform type identifier."""
+    return {
+        uti: (
+            item_types.get(uti, "unknown"),
+            item_type_extensions.get(uti, "unknown"),
+        )
+        for uti in item_types.keys() | item_type_extensions.keys()
+    }
+
+
 class PhotosService:
     """The 'Photos' iCloud service."""
 
@@ -135,10 +343,23 @@ class PhotosService:
         )
 
         self._albums = None
+        self._smart_albums = {}
+
+        # Keep a pool of warm connections to the photos host so paginated and
+        # concurrent album requests reuse TLS sessions instead of reconnecting.
+        self.session.mount(self._service_root, HTTPAdapter(pool_maxsize=32))
 
         self.params.update({"remapEnums": True, "getCurrentSyncToken": True})
 
-        url = f"{self.service_endpoint}/records/query?{urlencode(self.params)}"
+        # The params do not change after this point, so the endpoint URLs are
+        # built once; rebuild them here if params are ever updated later.
+        params = urlencode(self.params)
+        self._records_query_url = f"{self.service_endpoint}/records/query?{params}"
+        self._batch_query_url = (
+            f"{self.service_endpoint}/internal/records/query/batch?{params}"
+        )
+        self._modify_url = f"{self.service_endpoint}/records/modify?{params}"
+        url = self._records_query_url
         json_data = (
             '{"query":{"recordType":"CheckIndexingState"},'
             '"zoneID":{"zoneName":"PrimarySync"}}'
@@ -146,7 +367,7 @@ class PhotosService:
         request = self.session.post(
             url, data=json_data, headers={"Content-type": "text/plain"}
         )
-        response = request.json()
+        response = _response_json(request)
         indexing_state = response["records"][0]["fields"]["state"]["value"]
         if indexing_state != "FINISHED":
             logger.debug("iCloud Photo Library not finished indexing")
@@ -168,30 +389,38 @@ class PhotosService:
         """Returns photo albums."""
         if not self._albums:
             self._albums = {
-                name: PhotoAlbum(self, name, **props)
-                for (name, props) in self.SMART_FOLDERS.items()
+                name: self._smart_album(name) for name in self.SMART_FOLDERS
             }
 
             for folder in self._fetch_folders():
-
-                # Skiping albums having null name, that can happen sometime
-                if "albumNameEnc" not in folder["fields"]:
-                    continue
+                fields = folder["fields"]
 
                 # TODO: Handle subfolders  # pylint: disable=fixme
                 if folder["recordName"] == "----Root-Folder----" or (
-                    folder["fields"].get("isDeleted")
-                    and folder["fields"]["isDeleted"]["value"]
+                    fields.get("isDeleted") and fields["isDeleted"]["value"]
                 ):
                     continue
 
+                # Skiping albums having null name, that can happen sometime
+                if "albumNameEnc" not in fields:
+                    continue
+
                 folder_id = folder["recordName"]
                 folder_obj_type = (
                     "CPLContainerRelationNotDeletedByAssetDate:%s" % folder_id
                 )
-                folder_name = base64.b64decode(
-                    folder["fields"]["albumNameEnc"]["value"]
+                folder_name = binascii.a2b_base64(
+                    fields["albumNameEnc"]["value"]
                 ).decode("utf-8")
+
+                # Smart folders take precedence over user albums of the same
+                # name, as they are looked up without fetching the folders
+                if folder_name in self.SMART_FOLDERS:
+                    logger.debug(
+                        "Skipping album %s named like a smart folder", folder_name
+                    )
+                    continue
+
                 query_filter = [
                     {
                         "fieldName": "parentId",
@@ -213,42 +442,72 @@ class PhotosService:
         return self._albums
 
     def _fetch_folders(self):
-        url = f"{self.service_endpoint}/records/query?{urlencode(self.params)}"
-        json_data = (
-            '{"query":{"recordType":"CPLAlbumByPositionLive"},'
-            '"zoneID":{"zoneName":"PrimarySync"}}'
-        )
+        url = self._records_query_url
+        query = {
+            "query": {"recordType": "CPLAlbumByPositionLive"},
+            "zoneID": _ZONE_ID,
+        }
 
         request = self.session.post(
-            url, data=json_data, headers={"Content-type": "text/plain"}
+            url, data=_dumps(query), headers={"Content-type": "text/plain"}
         )
+        response = _response_json(request)
 
-        response = request.json()
-        
-        records = response["records"]
-        while 'continuationMarker' in response:
-            json_data = (
-            '{"query":{"recordType":"CPLAlbumByPositionLive"},'
-            '"zoneID":{"zoneName":"PrimarySync"},'
-            '"continuationMarker":"' + response['continuationMarker'] + '"}'
-            )
+        pages = [response["records"]]
+        while "continuationMarker" in response:
+            query["continuationMarker"] = response["continuationMarker"]
             request = self.session.post(
-                url, data=json_data, headers={"Content-type": "text/plain"}
+                url, data=_dumps(query), headers={"Content-type": "text/plain"}
             )
-            response = request.json()
-            records.extend(response["records"])
+            response = _response_json(request)
+            pages.append(response["records"])
+
+        return [record for page in pages for record in page]
+
+    def _smart_album(self, name):
+        album = self._smart_albums.get(name)
+        if album is None:
+            album = PhotoAlbum(self, name, **self.SMART_FOLDERS[name])
+            self._smart_albums[name] = album
+        return album
 
-        return records
+    def __getitem__(self, name):
+        """Returns an album by name, fetching folders only for user albums."""
+        if name in self.SMART_FOLDERS:
+            return self._smart_album(name)
+        return self.albums[name]
+
+    def __contains__(self, name):
+        return name in self.SMART_FOLDERS or name in self.albums
+
+    def __iter__(self):
+        """Iterates over the album names."""
+        return iter(self.albums)
 
     @property
     def all(self):
         """Returns all photos."""
-        return self.albums["All Photos"]
+        return self["All Photos"]
 
 
 class PhotoAlbum:
     """A photo album."""
 
+    __slots__ = (
+        "name",
+        "service",
+        "list_type",
+        "obj_type",
+        "_direction",
+        "_query_filter",
+        "page_size",
+        "concurrency",
+        "desired_keys",
+        "exception_handler",
+        "_len",
+        "_static_filters",
+    )
+
     def __init__(
         self,
         service,
@@ -258,38 +517,83 @@ class PhotoAlbum:
         direction,
         query_filter=None,
         page_size=100,
+        concurrency=1,
+        desired_keys=_FULL_KEYS,
     ):
         self.name = name
         self.service = service
         self.list_type = list_type
         self.obj_type = obj_type
-        self.direction = direction
-        self.query_filter = query_filter
+        self._direction = direction
+        self._query_filter = query_filter
         self.page_size = page_size
+        self.concurrency = concurrency
+        self.desired_keys = tuple(desired_keys)
         self.exception_handler = None
 
         self._len = None
+        # The direction and album filters are the same for every page request,
+        # so they are read-only.
+        self._static_filters = [
+            {
+                "fieldName": "direction",
+                "fieldValue": {"type": "STRING", "value": self.direction},
+                "comparator": "EQUALS",
+            },
+            *(self.query_filter or []),
+        ]
 
     @property
     def title(self):
         """Gets the album name."""
         return self.name
 
+    @property
+    def direction(self):
+        """Gets the album sort direction."""
+        return self._direction
+
+    @property
+    def query_filter(self):
+        """Gets the album query filters."""
+        return self._query_filter
+
     def __iter__(self):
         return self.photos
 
+    def iter_minimal(self):
+        """Iterates the album photos, requesting only the essential fields.
+
+        Assets expose their id, filename, type, dates and original versions;
+        medium and thumbnail versions are not available.
+        """
+        album = PhotoAlbum(
+            self.service,
+            self.name,
+            self.list_type,
+            self.obj_type,
+            self.direction,
+            self.query_filter,
+            self.page_size,
+            self.concurrency,
+            desired_keys=_MINIMAL_KEYS,
+        )
+        album.exception_handler = self.exception_handler
+        album._len = self._len  # pylint: disable=protected-access
+        try:
+            yield from album
+        finally:
+            # Keep an item count fetched while iterating
+            self._len = album._len  # pylint: disable=protected-access
+
     def __len__(self):
         if self._len is None:
-            url = "{}/internal/records/query/batch?{}".format(
-                self.service.service_endpoint,
-                urlencode(self.service.params),
-            )
             request = self.service.session.post(
-                url,
-                data=json.dumps(self._count_query_gen(self.obj_type)),
+                self.service._batch_query_url,  # pylint: disable=protected-access
+                data=_count_query_json(self.obj_type),
                 headers={"Content-type": "text/plain"},
             )
-            response = request.json()
+            response = _response_json(request)
 
             self._len = response["batch"][0]["records"][0]["fields"]["itemCount"][
                 "value"
@@ -300,215 +604,177 @@ class PhotoAlbum:
     # Perform the request in a separate method so that we
     # can mock it to test session errors.
     def photos_request(self, offset):
-        url = ('%s/records/query?' % self.service.service_endpoint) + \
-            urlencode(self.service.params)
+        url = self.service._records_query_url  # pylint: disable=protected-access
+        head = _dumps({"query": self._list_query_head(offset, self.list_type)})
         return self.service.session.post(
             url,
-            data=json.dumps(self._list_query_gen(
-                offset, self.list_type, self.direction,
-                self.query_filter)),
+            data=head[:-1] + b"," + _list_query_tail(
+                self.page_size * 2, self.desired_keys),
             headers={'Content-type': 'text/plain'}
         )
 
     @property
     def photos(self):
         """Returns the album photos."""
+        if self.concurrency > 1:
+            return self._photos_pipelined()
+        return self._photos_sequential()
+
+    def _photos_sequential(self):
         if self.direction == "DESCENDING":
             offset = len(self) - 1
         else:
             offset = 0
 
         exception_retries = 0
+        executor = ThreadPoolExecutor(max_workers=1)
+        next_request = None
+        response_json = _response_json
+        service = self.service
 
-        while(True):
-            try:
-                request = self.photos_request(offset)
-            except Exception as ex:
-                if self.exception_handler:
-                    exception_retries += 1
-                    self.exception_handler(ex, exception_retries)
-                    continue
-                else:
-                    logger.debug("Exception caught in PhotoAsset.photos, no exception handler registered. Rethrowing.")
-                    raise
+        try:
+            while(True):
+                try:
+                    if next_request is None:
+                        request = self.photos_request(offset)
+                    else:
+                        future, next_request = next_request, None
+                        request = future.result()
+                except Exception as ex:
+                    if self.exception_handler:
+                        exception_retries += 1
+                        self.exception_handler(ex, exception_retries)
+                        continue
+                    else:
+                        logger.debug("Exception caught in PhotoAsset.photos, no exception handler registered. Rethrowing.")
+                        raise
 
-            exception_retries = 0
-            response = request.json()
+                exception_retries = 0
+                page = self._page_records(response_json(request))
 
-            asset_records = {}
-            master_records = []
-            for rec in response["records"]:
-                if rec["recordType"] == "CPLAsset":
-                    master_id = rec["fields"]["masterRef"]["value"]["recordName"]
-                    asset_records[master_id] = rec
-                elif rec["recordType"] == "CPLMaster":
-                    master_records.append(rec)
+                if not page:
+                    break
 
-            master_records_len = len(master_records)
-            if master_records_len:
                 if self.direction == "DESCENDING":
-                    offset = offset - master_records_len
+                    offset -= len(page)
                 else:
-                    offset = offset + master_records_len
+                    offset += len(page)
+
+                # Fetch the next page while the caller works through this one.
+                next_request = executor.submit(self.photos_request, offset)
+
+                for master_record, asset_record in page:
+                    yield PhotoAsset(service, master_record, asset_record)
+        finally:
+            if next_request is not None:
+                next_request.cancel()
+            executor.shutdown(wait=False)
+
+    def _photos_pipelined(self):
+        # Pages are addressed by startRank, so the requests for the pages
+        # following the current one are issued speculatively, assuming full
+        # pages and bounded by the album length, and consumed in submission
+        # order. A short page (or a stale length) means the speculation was
+        # wrong: pending requests are dropped and fetching resumes from the
+        # real next offset. As in the sequential loop, an empty page ends it.
+        album_len = len(self)
+        if self.direction == "DESCENDING":
+            offset = album_len - 1
+            step = -self.page_size
+        else:
+            offset = 0
+            step = self.page_size
 
-                for master_record in master_records:
-                    record_name = master_record["recordName"]
-                    yield PhotoAsset(
-                        self.service, master_record, asset_records[record_name]
-                    )
-            else:
-                break
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        pending = deque()
 
-    def _count_query_gen(self, obj_type):
-        query = {
-            u'batch': [{
-                u'resultsLimit': 1,
-                u'query': {
-                    u'filterBy': {
-                        u'fieldName': u'indexCountID',
-                        u'fieldValue': {
-                            u'type': u'STRING_LIST',
-                            u'value': [
-                                obj_type
-                            ]
-                        },
-                        u'comparator': u'IN'
-                    },
-                    u'recordType': u'HyperionIndexCountLookup'
-                },
-                u'zoneWide': True,
-                u'zoneID': {
-                    u'zoneName': u'PrimarySync'
-                }
-            }]
-        }
+        def schedule(next_offset):
+            # The real next page is always requested, the pages after it
+            # only while they fall inside the album.
+            if not pending:
+                pending.append(
+                    (next_offset, executor.submit(self.photos_request, next_offset))
+                )
+            while len(pending) < self.concurrency:
+                next_offset = pending[-1][0] + step
+                if not 0 <= next_offset < album_len:
+                    break
+                pending.append(
+                    (next_offset, executor.submit(self.photos_request, next_offset))
+                )
 
-        return query
+        exception_retries = 0
+        response_json = _response_json
+        service = self.service
 
-    def _list_query_gen(self, offset, list_type, direction, query_filter=None):
-        query = {
-            "query": {
-                "filterBy": [
-                    {
-                        "fieldName": "startRank",
-                        "fieldValue": {"type": "INT64", "value": offset},
-                        "comparator": "EQUALS",
-                    },
-                    {
-                        "fieldName": "direction",
-                        "fieldValue": {"type": "STRING", "value": direction},
-                        "comparator": "EQUALS",
-                    },
-                ],
-                "recordType": list_type,
-            },
-            "resultsLimit": self.page_size * 2,
-            "desiredKeys": [
-                "resJPEGFullWidth",
-                "resJPEGFullHeight",
-                "resJPEGFullFileType",
-                "resJPEGFullFingerprint",
-                "resJPEGFullRes",
-                "resJPEGLargeWidth",
-                "resJPEGLargeHeight",
-                "resJPEGLargeFileType",
-                "resJPEGLargeFingerprint",
-                "resJPEGLargeRes",
-                "resJPEGMedWidth",
-                "resJPEGMedHeight",
-                "resJPEGMedFileType",
-                "resJPEGMedFingerprint",
-                "resJPEGMedRes",
-                "resJPEGThumbWidth",
-                "resJPEGThumbHeight",
-                "resJPEGThumbFileType",
-                "resJPEGThumbFingerprint",
-                "resJPEGThumbRes",
-                "resVidFullWidth",
-                "resVidFullHeight",
-                "resVidFullFileType",
-                "resVidFullFingerprint",
-                "resVidFullRes",
-                "resVidMedWidth",
-                "resVidMedHeight",
-                "resVidMedFileType",
-                "resVidMedFingerprint",
-                "resVidMedRes",
-                "resVidSmallWidth",
-                "resVidSmallHeight",
-                "resVidSmallFileType",
-                "resVidSmallFingerprint",
-                "resVidSmallRes",
-                "resSidecarWidth",
-                "resSidecarHeight",
-                "resSidecarFileType",
-                "resSidecarFingerprint",
-                "resSidecarRes",
-                "itemType",
-                "dataClassType",
-                "filenameEnc",
-                "originalOrientation",
-                "resOriginalWidth",
-                "resOriginalHeight",
-                "resOriginalFileType",
-                "resOriginalFingerprint",
-                "resOriginalRes",
-                "resOriginalAltWidth",
-                "resOriginalAltHeight",
-                "resOriginalAltFileType",
-                "resOriginalAltFingerprint",
-                "resOriginalAltRes",
-                "resOriginalVidComplWidth",
-                "resOriginalVidComplHeight",
-                "resOriginalVidComplFileType",
-                "resOriginalVidComplFingerprint",
-                "resOriginalVidComplRes",
-                "isDeleted",
-                "isExpunged",
-                "dateExpunged",
-                "remappedRef",
-                "recordName",
-                "recordType",
-                "recordChangeTag",
-                "masterRef",
-                "adjustmentRenderType",
-                "assetDate",
-                "addedDate",
-                "isFavorite",
-                "isHidden",
-                "orientation",
-                "duration",
-                "assetSubtype",
-                "assetSubtypeV2",
-                "assetHDRType",
-                "burstFlags",
-                "burstFlagsExt",
-                "burstId",
-                "captionEnc",
-                "locationEnc",
-                "locationV2Enc",
-                "locationLatitude",
-                "locationLongitude",
-                "adjustmentType",
-                "timeZoneOffset",
-                "vidComplDurValue",
-                "vidComplDurScale",
-                "vidComplDispValue",
-                "vidComplDispScale",
-                "vidComplVisibilityState",
-                "customRenderedValue",
-                "containerId",
-                "itemId",
-                "position",
-                "isKeyAsset",
-            ],
-            "zoneID": {"zoneName": "PrimarySync"},
-        }
+        try:
+            schedule(offset)
+            while pending:
+                page_offset, future = pending[0]
+                try:
+                    request = future.result()
+                except Exception as ex:
+                    if self.exception_handler:
+                        exception_retries += 1
+                        self.exception_handler(ex, exception_retries)
+                        pending[0] = (
+                            page_offset,
+                            executor.submit(self.photos_request, page_offset),
+                        )
+                        continue
+                    logger.debug("Exception caught in PhotoAsset.photos, no exception handler registered. Rethrowing.")
+                    raise
 
-        if query_filter:
-            query["query"]["filterBy"].extend(query_filter)
+                exception_retries = 0
+                pending.popleft()
+                page = self._page_records(response_json(request))
+                if not page:
+                    break
 
-        return query
+                if step < 0:
+                    offset = page_offset - len(page)
+                else:
+                    offset = page_offset + len(page)
+                if pending and pending[0][0] != offset:
+                    for _, stale_future in pending:
+                        stale_future.cancel()
+                    pending.clear()
+                    # Speculate with the page length the server actually returns.
+                    step = offset - page_offset
+                schedule(offset)
+
+                for master_record, asset_record in page:
+                    yield PhotoAsset(service, master_record, asset_record)
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def _page_records(response):
+        """Pairs each master record in a page with its asset record."""
+        asset_records = {}
+        master_records = []
+        add_master = master_records.append
+        for rec in response["records"]:
+            record_type = rec["recordType"]
+            if record_type == "CPLAsset":
+                asset_records[rec["fields"]["masterRef"]["value"]["recordName"]] = rec
+            elif record_type == "CPLMaster":
+                add_master(rec)
+
+        return [(rec, asset_records[rec["recordName"]]) for rec in master_records]
+
+    def _list_query_head(self, offset, list_type):
+        start_filter = {
+            "fieldName": "startRank",
+            "fieldValue": {"type": "INT64", "value": offset},
+            "comparator": "EQUALS",
+        }
+        return {
+            "filterBy": [start_filter, *self._static_filters],
+            "recordType": list_type,
+        }
 
     def __str__(self):
         return self.title
@@ -520,12 +786,29 @@ class PhotoAlbum:
 class PhotoAsset:
     """A photo."""
 
+    __slots__ = (
+        "_service",
+        "_master_record",
+        "_asset_record",
+        "_versions",
+        "_filename",
+        "_item_type",
+        "_item_type_extension",
+        "_asset_date",
+        "_added_date",
+    )
+
     def __init__(self, service, master_record, asset_record):
         self._service = service
         self._master_record = master_record
         self._asset_record = asset_record
 
         self._versions = None
+        self._filename = None
+        self._item_type = None
+        self._item_type_extension = None
+        self._asset_date = None
+        self._added_date = None
 
     ITEM_TYPES = {
         u"public.heic": u"image",
@@ -556,6 +839,8 @@ class PhotoAsset:
 
     }
 
+    _ITEM_INFO = _item_info(ITEM_TYPES, ITEM_TYPE_EXTENSIONS)
+
     PHOTO_VERSION_LOOKUP = {
         u"original": u"resOriginal",
         u"medium": u"resJPEGMed",
@@ -571,6 +856,11 @@ class PhotoAsset:
         "thumb": "resVidSmall",
     }
 
+    _PHOTO_VERSION_PLAN = _version_plan(PHOTO_VERSION_LOOKUP)
+    _VIDEO_VERSION_PLAN = _version_plan(VIDEO_VERSION_LOOKUP)
+
+    _EXT_SUFFIX_RE = re.compile(r"\.[^.]+$")
+
     @property
     def id(self):
         """Gets the photo id."""
@@ -578,19 +868,18 @@ class PhotoAsset:
 
     @property
     def filename(self):
+        if self._filename is None:
+            self._filename = self._record_filename()
+        return self._filename
+
+    def _record_filename(self):
         fields = self._master_record['fields']
         if 'filenameEnc' in fields and 'value' in fields['filenameEnc']:
-            if fields['filenameEnc']['value'].find(".png") > -1:
-                return fields['filenameEnc']['value']
-            if fields['filenameEnc']['value'].find(".dng") > -1:
-                return fields['filenameEnc']['value']
-            if fields['filenameEnc']['value'].find(".mp4") > -1:
-                return fields['filenameEnc']['value']
-            if fields['filenameEnc']['value'].find(".gif") > -1:
-                return fields['filenameEnc']['value']
-            return base64.b64decode(
-                fields['filenameEnc']['value']
-            ).decode('utf-8')
+            value = fields['filenameEnc']['value']
+            # Some filenames are returned in plain text rather than base64.
+            if _PLAINTEXT_EXT_RE.search(value):
+                return value
+            return binascii.a2b_base64(value).decode('utf-8')
 
         # Some photos don't have a filename.
         # In that case, just use the truncated fingerprint (hash),
@@ -611,19 +900,25 @@ class PhotoAsset:
     @property
     def asset_date(self):
         """Gets the photo asset date."""
-        try:
-            return datetime.utcfromtimestamp(
-                self._asset_record["fields"]["assetDate"]["value"] / 1000.0
-            ).replace(tzinfo=timezone.utc)
-        except KeyError:
-            return datetime.utcfromtimestamp(0).replace(tzinfo=timezone.utc)
+        if self._asset_date is None:
+            try:
+                self._asset_date = datetime.fromtimestamp(
+                    self._asset_record["fields"]["assetDate"]["value"] / 1000.0,
+                    tz=timezone.utc,
+                )
+            except KeyError:
+                self._asset_date = datetime.fromtimestamp(0, tz=timezone.utc)
+        return self._asset_date
 
     @property
     def added_date(self):
         """Gets the photo added date."""
-        return datetime.utcfromtimestamp(
-            self._asset_record["fields"]["addedDate"]["value"] / 1000.0
-        ).replace(tzinfo=timezone.utc)
+        if self._added_date is None:
+            self._added_date = datetime.fromtimestamp(
+                self._asset_record["fields"]["addedDate"]["value"] / 1000.0,
+                tz=timezone.utc,
+            )
+        return self._added_date
 
     @property
     def dimensions(self):
@@ -635,77 +930,68 @@ class PhotoAsset:
 
     @property
     def item_type(self):
-        item_type = self._master_record['fields']['itemType']['value']
-        if item_type in self.ITEM_TYPES:
-            return self.ITEM_TYPES[item_type]
-        logger.debug(f"returning unknown item_type for item_type {item_type}")
-        return 'unknown'
-        if self.filename.lower().endswith(('.heic', '.png', '.jpg', '.jpeg')):
-            return 'image'
-        return 'movie'
+        if self._item_type is None:
+            self._resolve_item_type()
+        return self._item_type
 
     @property
     def item_type_extension(self):
+        if self._item_type_extension is None:
+            self._resolve_item_type()
+        return self._item_type_extension
+
+    def _resolve_item_type(self):
         item_type = self._master_record['fields']['itemType']['value']
-        if item_type in self.ITEM_TYPE_EXTENSIONS:
-            return self.ITEM_TYPE_EXTENSIONS[item_type]
-        logger.debug(f"returning unknown item_type_extension for item_type {item_type}")
-        return 'unknown'
+        self._item_type, self._item_type_extension = self._ITEM_INFO.get(
+            item_type, ('unknown', 'unknown'))
+        if self._item_type == 'unknown':
+            logger.debug("returning unknown item_type for item_type %s", item_type)
+        if self._item_type_extension == 'unknown':
+            logger.debug(
+                "returning unknown item_type_extension for item_type %s", item_type)
 
     @property
     def versions(self):
         """Gets the photo versions."""
         if not self._versions:
             self._versions = {}
-            #if "resVidSmallRes" in self._master_record["fields"]:
-            if self.item_type == "movie":
-                typed_version_lookup = self.VIDEO_VERSION_LOOKUP
+            fields = self._master_record["fields"]
+            filename = self.filename
+            item_type = self.item_type
+            if item_type == "movie":
+                version_plan = self._VIDEO_VERSION_PLAN
             else:
-                typed_version_lookup = self.PHOTO_VERSION_LOOKUP
-
-            for key, prefix in typed_version_lookup.items():
-                if "%sRes" % prefix in self._master_record["fields"]:
-                    fields = self._master_record["fields"]
-                    filename = self.filename
-                    version = {"filename": self.filename}
-
-                    width_entry = fields.get("%sWidth" % prefix)
-                    if width_entry:
-                        version["width"] = width_entry["value"]
-                    else:
-                        version["width"] = None
+                version_plan = self._PHOTO_VERSION_PLAN
 
-                    height_entry = fields.get("%sHeight" % prefix)
-                    if height_entry:
-                        version["height"] = height_entry["value"]
-                    else:
-                        version["height"] = None
+            for key, width_key, height_key, res_key, type_key in version_plan:
+                if res_key not in fields:
+                    continue
 
-                    size_entry = fields.get("%sRes" % prefix)
-                    if size_entry:
-                        version["size"] = size_entry["value"]["size"]
-                        version["url"] = size_entry["value"]["downloadURL"]
-                    else:
-                        version["size"] = None
-                        version["url"] = None
+                res_entry = fields[res_key]
+
+                width_entry = fields.get(width_key)
+                height_entry = fields.get(height_key)
+                type_entry = fields.get(type_key)
+                version = {
+                    "filename": filename,
+                    "width": width_entry["value"] if width_entry else None,
+                    "height": height_entry["value"] if height_entry else None,
+                    "size": res_entry["value"]["size"] if res_entry else None,
+                    "url": res_entry["value"]["downloadURL"] if res_entry else None,
+                    "type": type_entry["value"] if type_entry else None,
+                }
 
-                    type_entry = fields.get("%sFileType" % prefix)
-                    if type_entry:
-                        version["type"] = type_entry["value"]
+                # Change live photo movie file extension to .MOV
+                if (item_type == "image" and
+                    version['type'] == "com.apple.quicktime-movie"):
+                    if filename.lower().endswith('.heic'):
+                        version['filename'] = self._EXT_SUFFIX_RE.sub(
+                            '_HEVC.MOV', filename)
                     else:
-                        version["type"] = None
+                        version['filename'] = self._EXT_SUFFIX_RE.sub(
+                            '.MOV', filename)
 
-                    # Change live photo movie file extension to .MOV
-                    if (self.item_type == "image" and
-                        version['type'] == "com.apple.quicktime-movie"):
-                        if filename.lower().endswith('.heic'):
-                            version['filename']=re.sub(
-                                '\.[^.]+$', '_HEVC.MOV', version['filename'])
-                        else:
-                            version['filename'] = re.sub(
-                                '\.[^.]+$', '.MOV', version['filename'])
-
-                    self._versions[key] = version
+                self._versions[key] = version
 
         return self._versions
 
@@ -720,36 +1006,28 @@ class PhotoAsset:
 
     def delete(self):
         """Deletes the photo."""
-        json_data = (
-            '{"query":{"recordType":"CheckIndexingState"},'
-            '"zoneID":{"zoneName":"PrimarySync"}}'
-        )
-
-        json_data = (
-            '{"operations":[{'
-            '"operationType":"update",'
-            '"record":{'
-            '"recordName":"%s",'
-            '"recordType":"%s",'
-            '"recordChangeTag":"%s",'
-            '"fields":{"isDeleted":{"value":1}'
-            "}}}],"
-            '"zoneID":{'
-            '"zoneName":"PrimarySync"'
-            '},"atomic":true}'
-            % (
-                self._asset_record["recordName"],
-                self._asset_record["recordType"],
-                self._master_record["recordChangeTag"],
-            )
+        json_data = _dumps(
+            {
+                "operations": [
+                    {
+                        "operationType": "update",
+                        "record": {
+                            "recordName": self._asset_record["recordName"],
+                            "recordType": self._asset_record["recordType"],
+                            "recordChangeTag": self._master_record["recordChangeTag"],
+                            "fields": {"isDeleted": {"value": 1}},
+                        },
+                    }
+                ],
+                "zoneID": _ZONE_ID,
+                "atomic": True,
+            }
         )
 
-        endpoint = self._service.service_endpoint
-        params = urlencode(self._service.params)
-        url = f"{endpoint}/records/modify?{params}"
-
         return self._service.session.post(
-            url, data=json_data, headers={"Content-type": "text/plain"}
+            self._service._modify_url,  # pylint: disable=protected-access
+            data=json_data,
+            headers={"Content-type": "text/plain"},
         )
 
     def __repr__(self):
@@ -3,6 +3,7 @@ import json
 from requests import Response
 
 from pyicloud import base
+from pyicloud.exceptions import PyiCloudAPIResponseException
 
 from .const import (
     AUTHENTICATED_USER,
@@ -34,6 +35,14 @@ from .const_drive import (
     DRIVE_FILE_DOWNLOAD_WORKING,
 )
 from .const_findmyiphone import FMI_FAMILY_WORKING
+from .const_photos import (
+    PHOTOS_ASSETS,
+    PHOTOS_CONTINUATION_MARKER,
+    PHOTOS_FOLDERS_PAGE_1,
+    PHOTOS_FOLDERS_PAGE_2,
+    PHOTOS_INDEXING_FINISHED,
+    PHOTOS_MASTERS,
+)
 
 
 class ResponseMock(Response):
@@ -52,10 +61,26 @@ class ResponseMock(Response):
         """Return text."""
         return json.dumps(self.result)
 
+    @property
+    def content(self):
+        """Return content."""
+        if self.raw is not None:
+            return super().content
+        return self.text.encode("utf-8")
+
 
 class PyiCloudSessionMock(base.PyiCloudSession):
     """Mocked PyiCloudSession."""
 
+    def __init__(self, service):
+        """Set up session mock."""
+        super().__init__(service)
+        # Photos library behaviour, adjustable per test.
+        self.photos_item_count = len(PHOTOS_MASTERS)
+        self.photos_max_page_size = None
+        self.photos_failures = {}
+        self.photos_requests = []
+
     def request(self, method, url, **kwargs):
         """Make the request."""
         params = kwargs.get("params")
@@ -155,8 +180,67 @@ class PyiCloudSessionMock(base.PyiCloudSession):
         if "fmi" in url and method == "POST":
             return ResponseMock(FMI_FAMILY_WORKING)
 
+        # Photos
+        if "com.apple.photos.cloud" in url and method == "POST":
+            self.photos_requests.append((url, data))
+            return self._photos_response(url, data)
+
         return None
 
+    def _photos_response(self, url, data):
+        """Answer a photos database query."""
+        if "records/query/batch" in url:
+            return ResponseMock(
+                {
+                    "batch": [
+                        {
+                            "records": [
+                                {
+                                    "recordType": "HyperionIndexCountLookup",
+                                    "fields": {
+                                        "itemCount": {
+                                            "value": self.photos_item_count,
+                                            "type": "INT64",
+                                        }
+                                    },
+                                }
+                            ]
+                        }
+                    ]
+                }
+            )
+        if "records/modify" in url:
+            return ResponseMock({"records": data["operations"][0]["record"]})
+
+        record_type = data["query"]["recordType"]
+        if record_type == "CheckIndexingState":
+            return ResponseMock(PHOTOS_INDEXING_FINISHED)
+        if record_type == "CPLAlbumByPositionLive":
+            if data.get("continuationMarker") == PHOTOS_CONTINUATION_MARKER:
+                return ResponseMock(PHOTOS_FOLDERS_PAGE_2)
+            return ResponseMock(PHOTOS_FOLDERS_PAGE_1)
+
+        filters = {
+            query_filter["fieldName"]: query_filter["fieldValue"]["value"]
+            for query_filter in data["query"]["filterBy"]
+        }
+        offset = filters["startRank"]
+        if self.photos_failures.get(offset):
+            self.photos_failures[offset] -= 1
+            raise PyiCloudAPIResponseException("Service Unavailable", 503)
+
+        page_size = data["resultsLimit"] // 2
+        if self.photos_max_page_size:
+            page_size = min(page_size, self.photos_max_page_size)
+        if filters["direction"] == "DESCENDING":
+            indexes = range(min(offset, len(PHOTOS_MASTERS) - 1), -1, -1)
+        else:
+            indexes = range(offset, len(PHOTOS_MASTERS))
+        records = []
+        for index in indexes[:page_size]:
+            records.extend((PHOTOS_ASSETS[index], PHOTOS_MASTERS[index]))
+        return ResponseMock({"records": records})
+
 
 class PyiCloudServiceMock(base.PyiCloudService):
     """Mocked PyiCloudService."""
@@ -0,0 +1,162 @@
+"""Photos test constants."""
+
+import base64
+
+# Data
+PHOTOS_INDEXING_FINISHED = {
+    "records": [
+        {
+            "recordName": "_CheckIndexingState_",
+            "recordType": "CheckIndexingState",
+            "fields": {
+                "progress": {"value": 100, "type": "INT64"},
+                "state": {"value": "FINISHED", "type": "STRING"},
+            },
+            "pluginFields": {},
+            "recordChangeTag": "0",
+            "created": {"timestamp": 1583237424010},
+            "modified": {"timestamp": 1583237424010},
+            "deleted": False,
+            "zoneID": {"zoneName": "PrimarySync", "zoneType": "REGULAR_CUSTOM_ZONE"},
+        }
+    ],
+    "syncToken": "AQAAAAAAAE3TgAAAAAAAAE3T",
+}
+
+# Contains a quote and a backslash, which must be escaped in the request body.
+PHOTOS_CONTINUATION_MARKER = 'AQAAAAAAAE3"Tg\\AAAA'
+
+PHOTOS_FOLDERS_PAGE_1 = {
+    "records": [
+        {
+            "recordName": "----Root-Folder----",
+            "recordType": "CPLAlbum",
+            "fields": {
+                "albumNameEnc": {"value": "Um9vdA==", "type": "ENCRYPTED_BYTES"}
+            },
+        },
+        {
+            "recordName": "2B0EA4A6-3A3F-4E8E-9C6B-0C8B1B7A36D3",
+            "recordType": "CPLAlbum",
+            "fields": {
+                "albumNameEnc": {"value": "SG9saWRheXM=", "type": "ENCRYPTED_BYTES"},
+                "isDeleted": {"value": 0, "type": "INT64"},
+            },
+        },
+        {
+            "recordName": "7D9F6A63-1B5C-4AC1-8E7A-0A1A2B1D3E4F",
+            "recordType": "CPLAlbum",
+            "fields": {
+                "albumNameEnc": {"value": "RGVsZXRlZA==", "type": "ENCRYPTED_BYTES"},
+                "isDeleted": {"value": 1, "type": "INT64"},
+            },
+        },
+        {
+            "recordName": "9A3C4E2D-58B1-4F0B-A2D6-1C7F3E9B0D11",
+            "recordType": "CPLAlbum",
+            "fields": {},
+        },
+    ],
+    "continuationMarker": PHOTOS_CONTINUATION_MARKER,
+}
+
+PHOTOS_FOLDERS_PAGE_2 = {
+    "records": [
+        {
+            "recordName": "E5F1A0C2-96D7-4B3A-8F25-3D4C5B6A7980",
+            "recordType": "CPLAlbum",
+            "fields": {
+                "albumNameEnc": {"value": "RmFtaWx5", "type": "ENCRYPTED_BYTES"}
+            },
+        },
+        {
+            "recordName": "0C6E2B9F-4D1A-4E37-B8C5-6F2A9D0E1B43",
+            "recordType": "CPLAlbum",
+            "fields": {
+                "albumNameEnc": {"value": "RmF2b3JpdGVz", "type": "ENCRYPTED_BYTES"}
+            },
+        },
+    ]
+}
+
+# Every fifth item is a video, the other ones are live photos.
+PHOTOS_MASTERS = [
+    {
+        "recordName": "AXh7Fy9zcRR1xM0bYfNQ%02d" % index,
+        "recordType": "CPLMaster",
+        "recordChangeTag": "3k%02d" % index,
+        "fields": {
+            "itemType": {
+                "value": "public.mpeg-4" if index % 5 == 0 else "public.heic",
+                "type": "STRING",
+            },
+            "filenameEnc": {
+                "value": base64.b64encode(
+                    (
+                        "MOV_%04d.mp4" % index
+                        if index % 5 == 0
+                        else "IMG_%04d.HEIC" % index
+                    ).encode("utf-8")
+                ).decode("utf-8"),
+                "type": "ENCRYPTED_BYTES",
+            },
+            "resOriginalWidth": {"value": 4032, "type": "INT64"},
+            "resOriginalHeight": {"value": 3024, "type": "INT64"},
+            "resOriginalFileType": {
+                "value": "public.mpeg-4" if index % 5 == 0 else "public.heic",
+                "type": "STRING",
+            },
+            "resOriginalRes": {
+                "value": {
+                    "size": 1000000 + index,
+                    "downloadURL": "https://cvws.icloud-content.com/B/original%02d"
+                    % index,
+                },
+                "type": "ASSETID",
+            },
+            "resJPEGThumbWidth": {"value": 480, "type": "INT64"},
+            "resJPEGThumbHeight": {"value": 360, "type": "INT64"},
+            "resJPEGThumbFileType": {"value": "public.jpeg", "type": "STRING"},
+            "resJPEGThumbRes": {
+                "value": {
+                    "size": 20000 + index,
+                    "downloadURL": "https://cvws.icloud-content.com/B/thumb%02d"
+                    % index,
+                },
+                "type": "ASSETID",
+            },
+            "resOriginalVidComplFileType": {
+                "value": "com.apple.quicktime-movie",
+                "type": "STRING",
+            },
+            "resOriginalVidComplRes": {
+                "value": {
+                    "size": 3000000 + index,
+                    "downloadURL": "https://cvws.icloud-content.com/B/live%02d" % index,
+                },
+                "type": "ASSETID",
+            },
+        },
+    }
+    for index in range(23)
+]
+
+PHOTOS_ASSETS = [
+    {
+        "recordName": "F2A3B6C1-0D4E-4A5B-9C8D-%012d" % index,
+        "recordType": "CPLAsset",
+        "fields": {
+            "masterRef": {
+                "value": {
+                    "recordName": master["recordName"],
+                    "action": "DELETE_SELF",
+                    "zoneID": {"zoneName": "PrimarySync"},
+                },
+                "type": "REFERENCE",
+            },
+            "assetDate": {"value": 1583237424010 + index * 1000, "type": "TIMESTAMP"},
+            "addedDate": {"value": 1583237500000 + index * 1000, "type": "TIMESTAMP"},
+        },
+    }
+    for index, master in enumerate(PHOTOS_MASTERS)
+]
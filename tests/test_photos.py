@@ -0,0 +1,356 @@
+"""Photos service tests."""
+from concurrent.futures import ThreadPoolExecutor
+import json
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+
+from pyicloud.exceptions import PyiCloudAPIResponseException
+from pyicloud.services import photos
+from pyicloud.services.photos import PhotoAlbum, PhotoAsset, PhotosService
+
+from . import PyiCloudServiceMock
+from .const import AUTHENTICATED_USER, VALID_PASSWORD
+from .const_photos import PHOTOS_CONTINUATION_MARKER, PHOTOS_MASTERS
+
+ASCENDING_IDS = [master["recordName"] for master in PHOTOS_MASTERS]
+DESCENDING_IDS = ASCENDING_IDS[::-1]
+
+
+class PhotosServiceTest(TestCase):
+    """Photos service tests."""
+
+    service = None
+
+    def setUp(self):
+        """Set up tests."""
+        self.service = PyiCloudServiceMock(AUTHENTICATED_USER, VALID_PASSWORD)
+        self.session = self.service.session
+
+    def folder_requests(self):
+        """Returns the folder listing requests made so far."""
+        return [
+            data
+            for _, data in self.session.photos_requests
+            if data.get("query", {}).get("recordType") == "CPLAlbumByPositionLive"
+        ]
+
+    def test_smart_album(self):
+        """Test smart albums are memoized and do not fetch folders."""
+        album = self.service.photos["Screenshots"]
+        assert album.name == "Screenshots"
+        assert self.service.photos["Screenshots"] is album
+        assert self.service.photos.all is self.service.photos["All Photos"]
+        assert not self.folder_requests()
+
+        assert self.service.photos.albums["Screenshots"] is album
+
+    def test_user_album(self):
+        """Test user albums from every folder page are listed."""
+        assert self.service.photos["Holidays"].name == "Holidays"
+        assert self.service.photos["Family"].name == "Family"
+        with pytest.raises(KeyError):
+            self.service.photos["Deleted"]  # pylint: disable=pointless-statement
+        assert "Root" not in self.service.photos
+
+    def test_user_album_named_like_smart_folder(self):
+        """Test smart folders take precedence over user albums of the same name."""
+        album = self.service.photos["Favorites"]
+        assert self.service.photos.albums["Favorites"] is album
+        assert album.obj_type == "CPLAssetInSmartAlbumByAssetDate:Favorite"
+        assert list(self.service.photos).count("Favorites") == 1
+
+    def test_continuation_marker(self):
+        """Test the folder continuation marker is escaped in the request body."""
+        self.service.photos.albums  # pylint: disable=pointless-statement
+        requests = self.folder_requests()
+        assert len(requests) == 2
+        assert requests[1]["continuationMarker"] == PHOTOS_CONTINUATION_MARKER
+
+    def test_contains(self):
+        """Test album membership."""
+        assert "Screenshots" in self.service.photos
+        assert not self.folder_requests()
+        assert "Holidays" in self.service.photos
+        assert "Unknown" not in self.service.photos
+
+    def test_iter(self):
+        """Test iterating over the album names."""
+        names = list(self.service.photos)
+        assert names[0] == "All Photos"
+        assert "Holidays" in names
+        assert "Family" in names
+        assert "Deleted" not in names
+
+
+class PhotoAlbumTest(TestCase):
+    """Photo album iteration tests."""
+
+    service = None
+
+    def setUp(self):
+        """Set up tests."""
+        self.service = PyiCloudServiceMock(AUTHENTICATED_USER, VALID_PASSWORD)
+        self.session = self.service.session
+
+    def album(self, direction="ASCENDING", concurrency=1):
+        """Returns a small-paged 'All Photos' album."""
+        props = PhotosService.SMART_FOLDERS["All Photos"]
+        return PhotoAlbum(
+            self.service.photos,
+            "All Photos",
+            props["list_type"],
+            props["obj_type"],
+            direction,
+            page_size=5,
+            concurrency=concurrency,
+        )
+
+    def test_len(self):
+        """Test the album item count."""
+        assert len(self.album()) == 23
+
+    def test_query_filters(self):
+        """Test page queries carry the start rank, direction and album filters."""
+        album = self.service.photos["Screenshots"]
+        album.photos_request(7)
+        _, data = self.session.photos_requests[-1]
+        assert data["query"]["recordType"] == album.list_type
+        assert data["query"]["filterBy"] == [
+            {
+                "fieldName": "startRank",
+                "fieldValue": {"type": "INT64", "value": 7},
+                "comparator": "EQUALS",
+            },
+            {
+                "fieldName": "direction",
+                "fieldValue": {"type": "STRING", "value": "ASCENDING"},
+                "comparator": "EQUALS",
+            },
+            *album.query_filter,
+        ]
+
+    def test_query_filters_read_only(self):
+        """Test the filters sent with every page request cannot be changed."""
+        album = self.album()
+        with pytest.raises(AttributeError):
+            album.direction = "DESCENDING"
+        with pytest.raises(AttributeError):
+            album.query_filter = []
+        assert [photo.id for photo in album] == ASCENDING_IDS
+
+    def test_order(self):
+        """Test assets are yielded in album order."""
+        for concurrency in (1, 4):
+            album = self.album(concurrency=concurrency)
+            assert [photo.id for photo in album] == ASCENDING_IDS
+
+    def test_order_descending(self):
+        """Test assets are yielded in reverse album order."""
+        for concurrency in (1, 4):
+            album = self.album("DESCENDING", concurrency)
+            assert [photo.id for photo in album] == DESCENDING_IDS
+
+    def test_short_pages(self):
+        """Test pages holding fewer masters than the page size."""
+        self.session.photos_max_page_size = 3
+        for direction, ids in (
+            ("ASCENDING", ASCENDING_IDS),
+            ("DESCENDING", DESCENDING_IDS),
+        ):
+            for concurrency in (1, 4):
+                album = self.album(direction, concurrency)
+                assert [photo.id for photo in album] == ids
+
+    def test_stale_len(self):
+        """Test assets beyond a stale item count are still yielded."""
+        self.session.photos_item_count = 10
+        for concurrency in (1, 4):
+            album = self.album(concurrency=concurrency)
+            assert [photo.id for photo in album] == ASCENDING_IDS
+
+    def test_exception_handler(self):
+        """Test failed page requests are retried through the exception handler."""
+        for concurrency in (1, 4):
+            self.session.photos_failures = {5: 1, 15: 2}
+            album = self.album(concurrency=concurrency)
+            retries = []
+            album.exception_handler = lambda ex, retry, log=retries: log.append(retry)
+            assert [photo.id for photo in album] == ASCENDING_IDS
+            assert retries == [1, 1, 2]
+
+    def test_exception_no_handler(self):
+        """Test failed page requests are raised without an exception handler."""
+        for concurrency in (1, 4):
+            self.session.photos_failures = {10: 1}
+            with pytest.raises(PyiCloudAPIResponseException):
+                list(self.album(concurrency=concurrency))
+
+    def test_photos_request_body(self):
+        """Test the spliced page request body holds the whole query."""
+        album = self.service.photos["Screenshots"]
+        album.photos_request(40)
+        _, data = self.session.photos_requests[-1]
+        assert list(data) == ["query", "resultsLimit", "desiredKeys", "zoneID"]
+        assert data["query"]["filterBy"][0]["fieldValue"]["value"] == 40
+        assert data["resultsLimit"] == 200
+        assert data["desiredKeys"] == list(album.desired_keys)
+        assert len(data["desiredKeys"]) > 90
+        assert data["zoneID"] == {"zoneName": "PrimarySync"}
+
+    def test_iter_minimal(self):
+        """Test iterating with the minimal set of record fields."""
+        album = self.album()
+        album_photos = list(album.iter_minimal())
+        assert [photo.id for photo in album_photos] == ASCENDING_IDS
+        assert album_photos[1].filename == "IMG_0001.HEIC"
+
+        _, data = self.session.photos_requests[-1]
+        assert "masterRef" in data["desiredKeys"]
+        assert "resJPEGThumbRes" not in data["desiredKeys"]
+
+        # The item count fetched while iterating is kept on the album
+        album = self.album("DESCENDING")
+        assert [photo.id for photo in album.iter_minimal()] == DESCENDING_IDS
+        requests = len(self.session.photos_requests)
+        assert len(album) == 23
+        assert len(self.session.photos_requests) == requests
+
+    def test_desired_keys(self):
+        """Test an album requesting custom record fields."""
+        props = PhotosService.SMART_FOLDERS["All Photos"]
+        album = PhotoAlbum(
+            self.service.photos,
+            "All Photos",
+            props["list_type"],
+            props["obj_type"],
+            props["direction"],
+            desired_keys=["recordName", "masterRef"],
+        )
+        next(iter(album))
+        _, data = self.session.photos_requests[-1]
+        assert data["desiredKeys"] == ["recordName", "masterRef"]
+
+    def test_photo(self):
+        """Test a photo from the album."""
+        photo = list(self.album())[1]
+        assert photo.filename == "IMG_0001.HEIC"
+        assert photo.item_type == "image"
+        assert photo.item_type_extension == "HEIC"
+        assert photo.size == 1000001
+        assert photo.dimensions == (4032, 3024)
+        assert photo.asset_date.isoformat() == "2020-03-03T12:10:25.010000+00:00"
+        assert photo.added_date.isoformat() == "2020-03-03T12:11:41+00:00"
+
+    def test_delete(self):
+        """Test deleting a photo."""
+        photo = next(iter(self.album()))
+        photo.delete()
+        url, data = self.session.photos_requests[-1]
+        assert "/records/modify?" in url
+        record = data["operations"][0]["record"]
+        assert record["recordType"] == "CPLAsset"
+        assert record["recordChangeTag"] == PHOTOS_MASTERS[0]["recordChangeTag"]
+        assert record["fields"] == {"isDeleted": {"value": 1}}
+
+    def test_executors_shut_down(self):
+        """Test page fetching threads are released when iteration ends."""
+        executors = []
+
+        def executor_factory(*args, **kwargs):
+            executor = ThreadPoolExecutor(*args, **kwargs)
+            executors.append(executor)
+            return executor
+
+        with patch.object(photos, "ThreadPoolExecutor", executor_factory):
+            for concurrency in (1, 4):
+                album = self.album(concurrency=concurrency)
+                assert len(list(album)) == 23
+
+                # Closed while the next page is being prefetched
+                album_photos = iter(album)
+                next(album_photos)
+                album_photos.close()
+
+        assert len(executors) == 4
+        for executor in executors:
+            with pytest.raises(RuntimeError):
+                executor.submit(print)
+
+
+class PhotosJsonTest(TestCase):
+    """Photos JSON encoding and decoding tests, with and without orjson."""
+
+    def test_dumps(self):
+        """Test request bodies are compact JSON bytes."""
+        query = {"query": {"recordType": "CPLAlbumByPositionLive"}, "name": "Été"}
+        for orjson in (photos.orjson, None):
+            with patch.object(photos, "orjson", orjson):
+                body = photos._dumps(query)  # pylint: disable=protected-access
+                assert isinstance(body, bytes)
+                assert b" " not in body
+                assert json.loads(body) == query
+
+    def test_albums_and_photos(self):
+        """Test responses are decoded the same with either parser."""
+        for orjson in (photos.orjson, None):
+            with patch.object(photos, "orjson", orjson):
+                service = PyiCloudServiceMock(AUTHENTICATED_USER, VALID_PASSWORD)
+                assert "Holidays" in service.photos.albums
+                assert [photo.id for photo in service.photos.all] == ASCENDING_IDS
+
+
+class PhotoAssetTest(TestCase):
+    """Photo asset tests."""
+
+    @staticmethod
+    def asset(fields):
+        """Returns an asset for the given master record fields."""
+        master_record = {"recordName": "AXh7Fy9zcRR1xM0bYfNQ99", "fields": fields}
+        return PhotoAsset(None, master_record, {"fields": {}})
+
+    def test_filename(self):
+        """Test base64 encoded and plain text filenames."""
+        for value, filename in (
+            ("SU1HXzAwMDEuSEVJQw==", "IMG_0001.HEIC"),
+            ("IMG_0002.PNG", "IMG_0002.PNG"),
+            ("MOV_0003.mp4", "MOV_0003.mp4"),
+            ("scan.dng.edited", "scan.dng.edited"),
+        ):
+            asset = self.asset({"filenameEnc": {"value": value}})
+            assert asset.filename == filename
+
+    def test_filename_missing(self):
+        """Test the filename of an asset without one."""
+        asset = self.asset({"itemType": {"value": "public.jpeg"}})
+        assert asset.filename == "AXh7Fy9zcRR1.JPG"
+
+    def test_versions(self):
+        """Test the versions of a live photo."""
+        asset = self.asset(PHOTOS_MASTERS[1]["fields"])
+        assert list(asset.versions) == ["original", "thumb", "originalVideo"]
+        assert asset.versions["original"] == {
+            "filename": "IMG_0001.HEIC",
+            "width": 4032,
+            "height": 3024,
+            "size": 1000001,
+            "url": "https://cvws.icloud-content.com/B/original01",
+            "type": "public.heic",
+        }
+        assert asset.versions["originalVideo"]["filename"] == "IMG_0001_HEVC.MOV"
+        assert asset.versions["originalVideo"]["width"] is None
+
+    def test_versions_movie(self):
+        """Test the versions of a movie."""
+        asset = self.asset(PHOTOS_MASTERS[0]["fields"])
+        assert list(asset.versions) == ["original"]
+        assert asset.versions["original"]["filename"] == "MOV_0000.mp4"
+
+    def test_versions_empty_res(self):
+        """Test a present but empty resource field still yields a version."""
+        fields = dict(PHOTOS_MASTERS[1]["fields"], resJPEGThumbRes=None)
+        version = self.asset(fields).versions["thumb"]
+        assert version["size"] is None
+        assert version["url"] is None
+        assert version["width"] == 480